@@ -6,29 +6,42 @@ It includes methods to create bar plots for different mutation contexts and save
 Functions:
 * format_xlabels(x_labels: list) -> list: Format x labels for the plots.
 * formatted_y_labels(x: float, _: int) -> str: Format numeric values for the y labels.
-* signature_pdf_plot(df: pd.DataFrame, figure_folder: Path) -> None: Generate signature plots based on mutation data.
-* context_96_barplot(df: pd.DataFrame, figure_folder: Path) -> None: Generate bar plots for 96 context mutations and save them in a PDF file.
-* larger_context_barplot(df_multi_context: pd.DataFrame, folder_path: Path) -> None: Generate bar plots for larger context mutations and save them in a PDF file.
+* signature_pdf_plot(df: pd.DataFrame, figure_folder: Path, n_jobs: int = 1) -> None: Generate signature plots based on mutation data.
+* context_96_barplot(df: pd.DataFrame, figure_folder: Path, n_jobs: int = 1) -> None: Generate bar plots for 96 context mutations and save them in a PDF file.
+* larger_context_barplot(df_multi_context: pd.DataFrame, folder_path: Path, n_jobs: int = 1) -> None: Generate bar plots for larger context mutations and save them in a PDF file.
+* write_signature_pdf(df, columns, parse_df, x_labels_ticks, pdf_path, n_jobs) -> None: Create a page for every signature in parallel and save them in one PDF file.
+* create_signature_pages(df, columns, parse_df, x_labels_ticks) -> bytes: Create a page for every signature in a PDF file in memory.
 * add_title_to_axe(ax: plt.axes, context: int) -> None: Add title to an axes.
 * create_expected_larger(df_dict: pd.DataFrame, expected_larger_sbs: list, folder_path: Path): Create a page with all three plots for every SBS and every DataFrame.
-* parse_lager_context_df(df: pd.DataFrame, col: str) -> pd.DataFrame: Parse the DataFrame to extract larger context mutation data.
+* smallest_context(mutation_types: pd.Series) -> pd.Series: Extract the smallest context of the mutation types.
+* substitution_type(mutation_types: pd.Series) -> pd.Series: Extract the substitution of the mutation types.
+* mutation_type_matrix(mutation_types: pd.Series) -> np.ndarray: Convert the mutation types to a matrix of ASCII codes.
+* parse_lager_context_df(df: pd.DataFrame, col: str, mutation_matrix: np.ndarray = None) -> pd.DataFrame: Parse the DataFrame to extract larger context mutation data.
 * parse_96_df(df: pd.DataFrame, col: str) -> pd.DataFrame: Parse the DataFrame to extract 96 context.
-* create_barplot(df, col: str, pdf: PdfPages, ax: plt.axes = None, write_sbs_title: bool = True): Create a bar plot based on mutation data and save it to a PDF file.
-* add_to_plot(info, ax, df, write_sbs_title): Add elements to a plot based on mutation data.
+* create_barplot(df, col: str, pdf: PdfPages, ax: plt.axes = None, write_sbs_title: bool = True, x_labels_ticks: list = None): Create a bar plot based on mutation data and save it to a PDF file.
+* save_figure_to_pdf(fig: plt.Figure, pdf: PdfPages) -> None: Save the figure as a new page of the PDF file.
+* add_to_plot(info, ax, write_sbs_title, x_labels_ticks): Add elements to a plot based on mutation data.
 * add_text_lines_to_plot(info, ax, write_sbs_title): Add text lines to a plot based on mutation data.
-* add_context_96_elements(info, ax, df): Add elements to the plot for context 96.
-* add_larger_context_elements(info, ax, df): Add elements to the plot for larger context.
+* add_context_96_elements(info, ax): Add elements to the plot for context 96.
+* add_larger_context_elements(info, ax): Add elements to the plot for larger context.
 * plot_context_bar(df, col): Plot a bar for the given mutation data and column.
 
 Author: J.A. Busker
 """
+import io
+import math
 from collections import namedtuple
+from collections.abc import Callable
+from functools import partial
 from pathlib import Path
 import pandas as pd
 import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from pypdf import PdfWriter
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
-from matplotlib.ticker import FuncFormatter
+from matplotlib.ticker import PercentFormatter
 from matplotlib.backends.backend_pdf import PdfPages
 from ..utils.helpers import (
 	generate_numbers,
@@ -57,9 +70,19 @@ ContextBarInfo = namedtuple(
 		"context",
 		"groups",
 		"mutations_group_length",
+		"heights",
 	],
 )
 
+# In the larger context plots, artists below this zorder (the bars and their
+# background) are drawn as one embedded image in the PDF,
+# the text and the axes stay vector graphics
+RASTERIZATION_ZORDER = 0
+BAR_ZORDER = RASTERIZATION_ZORDER - 1
+BACKGROUND_ZORDER = RASTERIZATION_ZORDER - 2
+# Resolution of the rasterized artists in the PDF
+PDF_DPI = 150
+
 
 def format_xlabels(x_labels: list) -> list:
 	"""
@@ -91,62 +114,152 @@ def formatted_y_labels(x: float, _: int) -> str:
 	# return f"{x:.2f}"
 
 
-def signature_pdf_plot(df: pd.DataFrame, figure_folder: Path) -> None:
+def signature_pdf_plot(df: pd.DataFrame, figure_folder: Path, n_jobs: int = 1) -> None:
 	"""
 	Generate signature plots based on mutation data.
 
 	Args:
 	    df (pd.DataFrame): DataFrame containing mutation data.
 	    figure_folder (Path): Path to the folder where the PDF file will be saved.
+	    n_jobs (int, optional): Number of processes creating the plots, -1 uses all CPUs. Defaults to 1.
 	"""
 	context = df.shape[0]
 	if context == 96:
-		context_96_barplot(df, figure_folder)
+		context_96_barplot(df, figure_folder, n_jobs)
 	else:
-		larger_context_barplot(df, figure_folder)
+		larger_context_barplot(df, figure_folder, n_jobs)
 
 
-def context_96_barplot(df: pd.DataFrame, figure_folder: Path) -> None:
+def context_96_barplot(df: pd.DataFrame, figure_folder: Path, n_jobs: int = 1) -> None:
 	"""
 	Generate bar plots for 96 context mutations and save them in a PDF file.
 
 	Args:
 	    df (pd.DataFrame): DataFrame containing mutation data.
 	    figure_folder (Path): Path to the folder where the PDF file will be saved.
+	    n_jobs (int, optional): Number of processes creating the plots, -1 uses all CPUs. Defaults to 1.
 	"""
 	# Sort the columns
 	sorted_columns = sorted(df.columns[1:], key=custom_sort_column_names)
-	# Use PdfPages for creating a multi-page PDF file
-	with PdfPages(figure_folder / "signatures.96.pdf") as pdf:
-		# Iterate over each column (mutation type) in sorted order
-		for col in sorted_columns:
-			# Parse the DataFrame to extract 96 context data for the current column
-			df_col = parse_96_df(df, col)
-			create_barplot(df_col, col, pdf, write_sbs_title=True)
+	# The x labels are the same for every signature
+	x_labels_ticks = format_xlabels(df.iloc[:, 0].unique())
+	write_signature_pdf(
+		df,
+		sorted_columns,
+		parse_96_df,
+		x_labels_ticks,
+		figure_folder / "signatures.96.pdf",
+		n_jobs,
+	)
 
 
-def larger_context_barplot(df_multi_context: pd.DataFrame, folder_path: Path) -> None:
+def larger_context_barplot(
+	df_multi_context: pd.DataFrame, folder_path: Path, n_jobs: int = 1
+) -> None:
 	"""
 	Generate bar plots for larger context mutations and save them in a PDF file.
 
 	Args:
 	    df_multi_context (pd.DataFrame): DataFrame containing mutation data.
 	    folder_path (Path): Path to the folder where the PDF file will be saved.
+	    n_jobs (int, optional): Number of processes creating the plots, -1 uses all CPUs. Defaults to 1.
 	"""
 	# Ectract the smallest context of the mutation
 	# eg: smalles context of AAG[C>A]TGA is G[C>A]T
-	df_multi_context["context"] = df_multi_context["MutationType"].str.extract(
-		r"(\w\[.*\]\w)"
-	)
+	df_multi_context["context"] = smallest_context(df_multi_context["MutationType"])
 	# Sort the columns
 	# The SBS name for consistency
 	sorted_columns = sorted(df_multi_context.columns[1:-1], key=custom_sort_column_names)
+	# The bars are grouped by the smallest context for every signature
+	x_labels_ticks = format_xlabels(MUTATION_LIST)
+	# The characters of the mutation types are the same for every signature
+	mutation_matrix = mutation_type_matrix(df_multi_context["MutationType"])
+	write_signature_pdf(
+		df_multi_context,
+		sorted_columns,
+		partial(parse_lager_context_df, mutation_matrix=mutation_matrix),
+		x_labels_ticks,
+		folder_path / f"signatures.{df_multi_context.shape[0]}.pdf",
+		n_jobs,
+	)
+
+
+def write_signature_pdf(
+	df: pd.DataFrame,
+	columns: list[str],
+	parse_df: Callable[[pd.DataFrame, str], pd.DataFrame],
+	x_labels_ticks: list,
+	pdf_path: Path,
+	n_jobs: int = 1,
+) -> None:
+	"""
+	Create a page for every signature and save them in one PDF file.
+	The signatures are split in one chunk per process, every process creates
+	the pages of its chunk and the chunks are merged in the same order.
+
+	Args:
+	    df (pd.DataFrame): DataFrame containing mutation data.
+	    columns (list[str]): The signatures to plot, in the order of the pages.
+	    parse_df (Callable[[pd.DataFrame, str], pd.DataFrame]): Function that parses the DataFrame for a signature.
+	    x_labels_ticks (list): Formatted x labels.
+	    pdf_path (Path): Path of the PDF file.
+	    n_jobs (int, optional): Number of processes creating the plots, -1 uses all CPUs. Defaults to 1.
+	"""
+	n_chunks = max(1, min(effective_n_jobs(n_jobs), len(columns)))
+	chunk_size = max(1, math.ceil(len(columns) / n_chunks))
+	chunks = [columns[i : i + chunk_size] for i in range(0, len(columns), chunk_size)]
+	chunk_pdfs = Parallel(n_jobs=n_chunks)(
+		delayed(create_signature_pages)(df, chunk, parse_df, x_labels_ticks)
+		for chunk in chunks
+	)
+	writer = PdfWriter()
+	for chunk_pdf in chunk_pdfs:
+		writer.append(io.BytesIO(chunk_pdf))
+	# Merge the pages in memory and write the file at once
+	buffer = io.BytesIO()
+	writer.write(buffer)
+	pdf_path.write_bytes(buffer.getvalue())
+
+
+def create_signature_pages(
+	df: pd.DataFrame,
+	columns: list[str],
+	parse_df: Callable[[pd.DataFrame, str], pd.DataFrame],
+	x_labels_ticks: list,
+) -> bytes:
+	"""
+	Create a page for every signature in a PDF file in memory.
+
+	Args:
+	    df (pd.DataFrame): DataFrame containing mutation data.
+	    columns (list[str]): The signatures to plot, in the order of the pages.
+	    parse_df (Callable[[pd.DataFrame, str], pd.DataFrame]): Function that parses the DataFrame for a signature.
+	    x_labels_ticks (list): Formatted x labels.
+
+	Returns:
+	    bytes: The PDF file with the pages.
+	"""
+	buffer = io.BytesIO()
+	# Reuse the same figure for every signature
+	# The figure is not managed by pyplot, so no GUI backend is involved
+	fig = Figure(figsize=(20, 10))
+	ax = fig.subplots()
 	# Use PdfPages for creating a multi-page PDF file
-	with PdfPages(folder_path / f"signatures.{df_multi_context.shape[0]}.pdf") as pdf:
-		for col in sorted_columns:
-			# Parse the DataFrame to extract larger context data for the current column
-			df_col = parse_lager_context_df(df_multi_context, col)
-			create_barplot(df_col, col, pdf, write_sbs_title=True)
+	with PdfPages(buffer) as pdf:
+		for col in columns:
+			ax.cla()
+			# Parse the DataFrame to extract the data for the current column
+			df_col = parse_df(df, col)
+			create_barplot(
+				df_col,
+				col,
+				pdf,
+				ax=ax,
+				write_sbs_title=True,
+				x_labels_ticks=x_labels_ticks,
+			)
+			save_figure_to_pdf(fig, pdf)
+	return buffer.getvalue()
 
 
 def add_title_to_axe(ax: plt.axes, context: int) -> None:
@@ -194,9 +307,23 @@ def create_expected_larger(
 	# Raise error
 	if len(expected_larger_sbs) == 0:
 		raise ValueError("No of the SBS are in all the dataframes")
+	# The smallest context and the x labels do not depend on the SBS
+	x_labels_ticks = {}
+	mutation_matrices = {}
+	for size, data in df_dict.items():
+		if size == 96:
+			x_labels_ticks[size] = format_xlabels(data.iloc[:, 0].unique())
+		else:
+			# Ectract the smallest context of the mutation
+			# eg: smalles context of AAG[C>A]TGA is G[C>A]T
+			data["context"] = smallest_context(data["MutationType"])
+			x_labels_ticks[size] = format_xlabels(MUTATION_LIST)
+			mutation_matrices[size] = mutation_type_matrix(data["MutationType"])
 	for sbs in expected_larger_sbs:
 		plot_name = folder_path / f"{sbs}.pdf"
-		with PdfPages(plot_name) as pdf:
+		# Create the PDF in memory and write the file at once
+		buffer = io.BytesIO()
+		with PdfPages(buffer) as pdf:
 			logger.log_info(f"Creating Signature plot for {sbs}")
 			# Create a grid for subplots using GridSpec
 			gs = GridSpec(2, 2, height_ratios=[0.8, 0.8])
@@ -212,13 +339,16 @@ def create_expected_larger(
 				data = df_dict[size]
 				if size == 96:
 					df = parse_96_df(data, sbs)
-					create_barplot(df, sbs, pdf, ax=ax, write_sbs_title=False)
 				else:
-					# Ectract the smallest context of the mutation
-					# eg: smalles context of AAG[C>A]TGA is G[C>A]T
-					data["context"] = data["MutationType"].str.extract(r"(\w\[.*\]\w)")
-					df = parse_lager_context_df(data, sbs)
-					create_barplot(df, sbs, pdf, ax=ax, write_sbs_title=False)
+					df = parse_lager_context_df(data, sbs, mutation_matrices[size])
+				create_barplot(
+					df,
+					sbs,
+					pdf,
+					ax=ax,
+					write_sbs_title=False,
+					x_labels_ticks=x_labels_ticks[size],
+				)
 			# Set the title for the entire figure
 			fig.suptitle(f"Signature {sbs}", fontsize=40, fontweight="bold", y=1.05)
 			# Add a subsubtitle
@@ -230,69 +360,121 @@ def create_expected_larger(
 				fontsize=30,
 			)
 			# Save the plots to the PDF page
-			plt.tight_layout()
-			pdf.savefig(bbox_inches="tight")
-			plt.close()
-			logger.log_info(f"Created Signature plot for {sbs}")
+			save_figure_to_pdf(fig, pdf)
+			plt.close(fig)
+		plot_name.write_bytes(buffer.getvalue())
+		logger.log_info(f"Created Signature plot for {sbs}")
+
+
+def mutation_type_matrix(mutation_types: pd.Series) -> np.ndarray:
+	"""
+	Convert the mutation types to a matrix of ASCII codes.
+	Every row is a mutation type and every column a position in the mutation type.
 
+	Args:
+	    mutation_types (pd.Series): Mutation types of equal length, eg: CA[C>A]AG.
 
-def parse_lager_context_df(df: pd.DataFrame, col: str) -> pd.DataFrame:
+	Returns:
+	    np.ndarray: 2D uint8 array with the ASCII code of every character.
+	"""
+	return np.frombuffer(
+		"".join(mutation_types).encode("ascii"), dtype=np.uint8
+	).reshape(len(mutation_types), -1)
+
+
+def smallest_context(mutation_types: pd.Series) -> pd.Series:
+	"""
+	Extract the smallest context of the mutation types.
+	eg: smallest context of AAG[C>A]TGA is G[C>A]T
+
+	The substitution is always in the middle of the mutation type,
+	so the context is sliced at a fixed offset.
+
+	Args:
+	    mutation_types (pd.Series): Mutation types of equal length.
+
+	Returns:
+	    pd.Series: The smallest context of every mutation type.
+	"""
+	middle = len(mutation_types.iloc[0]) // 2
+	return mutation_types.str.slice(middle - 3, middle + 4)
+
+
+def substitution_type(mutation_types: pd.Series) -> pd.Series:
+	"""
+	Extract the substitution of the mutation types.
+	eg: substitution of AAG[C>A]TGA is C>A
+
+	Args:
+	    mutation_types (pd.Series): Mutation types of equal length.
+
+	Returns:
+	    pd.Series: The substitution of every mutation type.
+	"""
+	middle = len(mutation_types.iloc[0]) // 2
+	return mutation_types.str.slice(middle - 1, middle + 2)
+
+
+def parse_lager_context_df(
+	df: pd.DataFrame, col: str, mutation_matrix: np.ndarray = None
+) -> pd.DataFrame:
 	"""
 	Parse the DataFrame to extract larger context mutation data.
 
 	Args:
 	    df (pd.DataFrame): DataFrame containing mutation data.
 	    col (str): Name of the column to parse.
+	    mutation_matrix (np.ndarray, optional): The mutation_type_matrix of df["MutationType"]. Defaults to None, then it is created from df.
 
 	Returns:
 	    pd.DataFrame: Resulting DataFrame with parsed data.
 	"""
-	# Result df
-	result_df = pd.DataFrame()
+	if mutation_matrix is None:
+		mutation_matrix = mutation_type_matrix(df["MutationType"])
 	amino = ["A", "C", "T", "G"]
-	col_df = pd.DataFrame(
-		{
-			"MutationType": df["MutationType"],
-			col: df[col],
-			"context": df["context"],
-		}
+	amino_codes = np.frombuffer("".join(amino).encode("ascii"), dtype=np.uint8)
+	# These are the indices of the extra context
+	# eg: CA[C>A]AG return [0,8] those are the indices of C and G
+	context_index_list = generate_numbers(mutation_matrix.shape[1] - 4)
+	# These are the position for the bars
+	# eg: CA[C>A]AG return -1, 1
+	# So that C is ploitted before G
+	seq = generate_sequence(mutation_matrix.shape[1] - 4)
+	# The values of the rows for every extra context index and nucleotide
+	# Shape: (rows, extra context indices, nucleotides)
+	# Missing values count as 0, like they are skipped by a pandas sum
+	col_values = np.nan_to_num(df[col].to_numpy(dtype=float))
+	nucleotide_values = col_values[:, None, None] * (
+		mutation_matrix[:, context_index_list, None] == amino_codes
 	)
-	# For every uniqe mutation
-	for mut in MUTATION_LIST:
-		# Create temp df
-		temp_df = col_df[(col_df["context"] == mut)]
-		total_sbs_mut = temp_df[col].sum()
-		# These are the indices of the extra context
-		# eg: CA[C>A]AG return [0,8] those are the indices of C and G
-		context_index_list = generate_numbers(len(df["MutationType"][0]) - 4)
-		# These are the position for the bars
-		# eg: CA[C>A]AG return -1, 1
-		# So that C is ploitted before G
-		seq = generate_sequence(len(df["MutationType"][0]) - 4)
-		contex_name_generator = zip(context_index_list, seq)
-		for idx, name in contex_name_generator:
-			for aa in amino:
-				row = {
-					"name": name,
-					"context": mut,
-					"variable": aa,
-					"sbs": col,
-				}
-				if total_sbs_mut == 0:
-					row["value"] = 0
-				else:
-					filtered_df = temp_df[temp_df["MutationType"].str[idx] == aa]
-					total_filtered = filtered_df[col].sum()
-					row["value"] = total_filtered
-				# Create a df of the values for every extra context
-				# eg: CA[C>A]AG
-				# eg: C: 0.05
-				# eg: G: 0.1
-				result_df = pd.concat(
-					[result_df, pd.DataFrame(row, index=[0])],
-					ignore_index=True,
-				)
-	return result_df
+	# Sum those values per mutation, contexts without any value are 0
+	context_codes = pd.Categorical(df["context"], categories=MUTATION_LIST).codes
+	context_matrix = context_codes[:, None] == np.arange(len(MUTATION_LIST))
+	context_sums = (
+		context_matrix.T.astype(float) @ nucleotide_values.reshape(len(df), -1)
+	).reshape(len(MUTATION_LIST), len(context_index_list), len(amino))
+	# The values for every extra context
+	# eg: CA[C>A]AG
+	# eg: C: 0.05
+	# eg: G: 0.1
+	# One row for every mutation, extra context index and nucleotide
+	# Only a few distinct values per column, store them as categories
+	index = pd.MultiIndex.from_product(
+		[
+			pd.CategoricalIndex(MUTATION_LIST, categories=MUTATION_LIST, ordered=True),
+			pd.CategoricalIndex(seq, categories=seq, ordered=True),
+			pd.CategoricalIndex(amino, categories=amino, ordered=True),
+		],
+		names=["context", "name", "variable"],
+	)
+	result_df = pd.DataFrame(
+		{
+			"sbs": pd.Categorical([col] * len(index)),
+			"value": context_sums.ravel(),
+		},
+		index=index,
+	).reset_index()
+	return result_df[["name", "context", "variable", "sbs", "value"]]
 
 
 def parse_96_df(df: pd.DataFrame, col: str) -> pd.DataFrame:
@@ -308,7 +490,7 @@ def parse_96_df(df: pd.DataFrame, col: str) -> pd.DataFrame:
 	"""
 	mut_col = "MutationType"
 	temp_df = pd.DataFrame({mut_col: df.iloc[:, 0], col: df[col]})
-	temp_df["mutation"] = temp_df[mut_col].str.extract(r"\[(.*?)\]")
+	temp_df["mutation"] = substitution_type(temp_df[mut_col])
 	return temp_df
 
 
@@ -318,6 +500,7 @@ def create_barplot(
 	pdf: PdfPages,
 	ax: plt.axes = None,
 	write_sbs_title: bool = True,
+	x_labels_ticks: list = None,
 ) -> None:
 	"""
 	Create a bar plot based on mutation data and save it to a PDF file.
@@ -328,25 +511,40 @@ def create_barplot(
 	    pdf (PdfPages): PDF file to save the plot.
 	    ax (plt.axes, optional): Matplotlib axes. Defaults to None.
 	    write_sbs_title (bool, optional): Whether to write the SBS title on the plot. Defaults to True.
+	    x_labels_ticks (list, optional): Formatted x labels. Defaults to None, then they are formatted from the data.
 	"""
 	# If ax is not provided, create a new subplot
 	ax_none = False
 	if ax is None:
 		ax_none = True
 	if ax_none:
-		_, ax = plt.subplots(figsize=(20, 10))
+		fig, ax = plt.subplots(figsize=(20, 10))
 	# Plot the context bar using helper functions
 	info = plot_context_bar(df, col)
-	add_to_plot(info, ax, df, write_sbs_title)
+	add_to_plot(info, ax, write_sbs_title, x_labels_ticks)
 	# If ax was created inside this function, save the plot to the PDF
 	if ax_none:
-		plt.tight_layout()
-		pdf.savefig(bbox_inches="tight")
-		plt.close()
+		save_figure_to_pdf(fig, pdf)
+		plt.close(fig)
+
+
+def save_figure_to_pdf(fig: plt.Figure, pdf: PdfPages) -> None:
+	"""
+	Save the figure as a new page of the PDF file.
+
+	Args:
+	    fig (plt.Figure): Matplotlib figure.
+	    pdf (PdfPages): PDF file to save the figure.
+	"""
+	fig.tight_layout()
+	pdf.savefig(fig, dpi=PDF_DPI, bbox_inches="tight")
 
 
 def add_to_plot(
-	info: ContextBarInfo, ax: plt.axes, df: pd.DataFrame, write_sbs_title: bool
+	info: ContextBarInfo,
+	ax: plt.axes,
+	write_sbs_title: bool,
+	x_labels_ticks: list = None,
 ) -> None:
 	"""
 	Add elements to a plot based on mutation data.
@@ -354,27 +552,31 @@ def add_to_plot(
 	Args:
 	    info (ContextBarInfo): Information about the context.
 	    ax (plt.axes): Matplotlib axes.
-	    df (pd.DataFrame): DataFrame containing mutation data.
 	    write_sbs_title (bool): Whether to write the SBS title on the plot.
+	    x_labels_ticks (list, optional): Formatted x labels. Defaults to None, then they are formatted from info.labels.
 	"""
 	# Add vertical lines between each mutation type
 	# And add the mutation type at the top
+	# Only rasterize the larger contexts, they have thousands of bars
+	# The 96 context is smaller and faster as vector graphics
+	ax.set_rasterization_zorder(RASTERIZATION_ZORDER if info.context != 96 else None)
 	add_text_lines_to_plot(info, ax, write_sbs_title)
 	if info.context == 96:
-		add_context_96_elements(info, ax, df)
+		add_context_96_elements(info, ax)
 	else:
-		add_larger_context_elements(info, ax, df)
+		add_larger_context_elements(info, ax)
 	# Formatted x labels
-	x_labels_ticks = format_xlabels(info.labels)
+	if x_labels_ticks is None:
+		x_labels_ticks = format_xlabels(info.labels)
 	ax.set_xticks(info.x0)
 	ax.set_xticklabels(x_labels_ticks, rotation=90, ha="center", fontfamily="monospace")
 	ax.legend(loc="upper right")
 	ax.set_xlabel("Trinucleotide Contexts", weight="bold")
 	ax.set_ylabel("Percentage OF Single Base Substitution", weight="bold")
-	plt.xlim(-1, len(info.labels))
-	plt.ylim(0, 1)
+	ax.set_xlim(-1, len(info.labels))
+	ax.set_ylim(0, 1)
 	# Format the ylabels to percentages
-	plt.gca().yaxis.set_major_formatter(FuncFormatter(formatted_y_labels))
+	ax.yaxis.set_major_formatter(PercentFormatter(xmax=1, decimals=0))
 
 
 def add_text_lines_to_plot(
@@ -396,7 +598,7 @@ def add_text_lines_to_plot(
 		# Calculate the text position in the middle of the indices list
 		text_x = indices_list[len(indices_list) // 2]
 		# Add mutation type as text at the top of the plot
-		plt.text(
+		ax.text(
 			text_x,
 			0.95,
 			mutation_type,
@@ -418,6 +620,7 @@ def add_text_lines_to_plot(
 			bg_color_x_max,
 			facecolor=COLOR_BG[index],
 			alpha=0.25,
+			zorder=BACKGROUND_ZORDER,
 		)
 		# UNCOMMENT THIS
 		# Adds a line between each group
@@ -427,7 +630,7 @@ def add_text_lines_to_plot(
 	# If specified, add the SBS title to the top-left corner of the plot
 	if write_sbs_title:
 		# SBS NAME ON THE PLOT
-		plt.text(
+		ax.text(
 			0.5,
 			1.07,
 			info.title,
@@ -437,7 +640,7 @@ def add_text_lines_to_plot(
 			fontsize=24,
 			fontweight="heavy",
 		)
-		plt.text(
+		ax.text(
 			0.5,
 			1.01,
 			"Probability Distribution of Mutation Contexts for Each Substitution Type",
@@ -447,63 +650,45 @@ def add_text_lines_to_plot(
 		)
 
 
-def add_context_96_elements(info: ContextBarInfo, ax: plt.axes, df: pd.DataFrame):
+def add_context_96_elements(info: ContextBarInfo, ax: plt.axes) -> None:
 	"""
 	Add elements to the plot for context 96.
 
 	Args:
 	    info (ContextBarInfo): Information about the context.
 	    ax (plt.axes): Matplotlib axes.
-	    df (pd.DataFrame): DataFrame containing mutation data.
 	"""
-	# Set to track added labels
-	added_labels = set()
-	for x, mutation in zip(info.x1, info.names):
-		bottom = 0
-		color = COLOR_DICT_MUTATION[mutation]
-		value = df.iloc[x, 1]
-		# Otherwise, you get a very large legend with duplicate labels
-		if mutation not in added_labels:
-			# Add a bar for the mutation type with appropriate color and label
-			ax.bar(
-				x=x,
-				height=value,
-				width=info.w,
-				bottom=bottom,
-				label=mutation,
-				color=color,
-			)
-			# Add the mutation type label to the set of added labels
-			added_labels.add(mutation)
-		else:
-			# If the label is already added, add a bar without a label
-			ax.bar(x=x, height=value, width=info.w, bottom=bottom, color=color)
+	mutations = info.names.to_numpy()
+	# Add the bars of every mutation type at once with its color and label
+	# So every mutation type has one legend entry
+	for mutation in info.names.unique():
+		mask = mutations == mutation
+		ax.bar(
+			x=info.x1[mask],
+			height=info.heights[mask],
+			width=info.w,
+			label=mutation,
+			color=COLOR_DICT_MUTATION[mutation],
+			zorder=BAR_ZORDER,
+		)
 
 
-def add_larger_context_elements(
-	info: ContextBarInfo, ax: plt.axes, df: pd.DataFrame
-) -> None:
+def add_larger_context_elements(info: ContextBarInfo, ax: plt.axes) -> None:
 	"""
 	Add elements to the plot for larger context.
 
 	Args:
 	    info (ContextBarInfo): Information about the context.
 	    ax (plt.axes): Matplotlib axes.
-	    df (pd.DataFrame): DataFrame containing mutation data.
 	"""
 	# Set to track added labels
 	added_labels = set()
-	# Create a dictionary to organize the data by mutation type and variable
-	data = {
-		f"{name}{variable}": group
-		for (name, variable), group in df.groupby(["name", "variable"])
-	}
 	# Iterate over positions (x) and names
-	for x, name in zip(info.x1, info.names):
+	for name_index, x in enumerate(info.x1):
 		bottom = 0
 		# Iterate over nucleotides (variables)
-		for nucleotide in info.variable:
-			height = data[f"{name}{nucleotide}"].value.to_numpy()
+		for variable_index, nucleotide in enumerate(info.variable):
+			height = info.heights[name_index, variable_index]
 			color = COLOR_DICT[nucleotide]
 			# Otherwise, you get a very large legend with duplicate labels
 			if nucleotide not in added_labels:
@@ -515,6 +700,7 @@ def add_larger_context_elements(
 					bottom=bottom,
 					color=color,
 					label=nucleotide,
+					zorder=BAR_ZORDER,
 				)
 				# Add the nucleotide label to the set of added labels
 				added_labels.add(nucleotide)
@@ -526,6 +712,7 @@ def add_larger_context_elements(
 					width=info.w,
 					bottom=bottom,
 					color=color,
+					zorder=BAR_ZORDER,
 				)
 			bottom += height
 
@@ -551,15 +738,19 @@ def plot_context_bar(df: pd.DataFrame, col: str) -> None:
 		w = 0.8
 		x1 = x0.copy()
 		variable = None
-		groups = df.groupby("mutation").groups.items()
+		groups = df.groupby("mutation", sort=False, observed=True).groups.items()
 		mutations_group_length = len(groups)
+		heights = df.iloc[:, 1].to_numpy()
 	else:
 		# For larger context, mutations are grouped and represented in stacked bars
+		# Organize the values in one pass in a table of (name, variable) by context
+		# The rows and columns follow the order of the categories
+		values = df.pivot(index=["name", "variable"], columns="context", values="value")
 		# Get the title and the labels
-		title = df["sbs"].unique()[0]
-		labels = df["context"].drop_duplicates()
+		title = df["sbs"].iloc[0]
+		labels = values.columns
 		x0 = np.arange(len(labels))
-		names = df.name.unique()
+		names, variable = values.index.levels
 		stacks = len(names)
 		w = 0.45
 		# These are for the position for the plots
@@ -576,12 +767,13 @@ def plot_context_bar(df: pd.DataFrame, col: str) -> None:
 				x0 + w * 2 / stacks,
 				x0 + w * 4 / stacks + w / 2,
 			]
-		variable = df.variable.unique()
+		# The heights in an array of shape (names, variables, contexts)
+		heights = values.to_numpy().reshape(len(names), len(variable), -1)
 		# Split indices into sublists for each mutation type in the larger context
 		sublist_length = len(x0) // 6
 		indices = [x0[i : i + sublist_length] for i in range(0, len(x0), sublist_length)]
 		# Extract unique mutation types from the larger context
-		mutation_types = df["context"].str.extract(r"\[(.*?)\]")[0].unique()
+		mutation_types = substitution_type(pd.Series(labels)).unique()
 		groups = zip(mutation_types, indices)
 		mutations_group_length = len(mutation_types)
 	# Return the information about the context
@@ -596,4 +788,5 @@ def plot_context_bar(df: pd.DataFrame, col: str) -> None:
 		df.shape[0],
 		groups,
 		mutations_group_length,
+		heights,
 	)
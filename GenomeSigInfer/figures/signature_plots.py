@@ -46,17 +46,25 @@ class SigPlots:
 		    dict: A dictionary containing decomposed mutation data DataFrames for different mutation context sizes.
 
 		This method reads the decomposed mutation data for different mutation contexts from the NMF folder and returns a dictionary containing DataFrames for each size.
+		The mutation types are read as Arrow backed strings, for fast string slicing in the plots.
 		"""
 		decompose_dict = {
-			size: pd.read_csv(self.nmf_folder / f"decompose.{size}.txt", sep="\t")
+			size: pd.read_csv(
+				self.nmf_folder / f"decompose.{size}.txt",
+				sep="\t",
+				dtype={"MutationType": "string[pyarrow]"},
+			)
 			for size in helpers.MutationalSigantures.SIZES
 		}
 		return decompose_dict
 
-	def create_plots(self) -> None:
+	def create_plots(self, n_jobs: int = 1) -> None:
 		"""
 		Create signature plots based on mutation data.
 
+		Args:
+		    n_jobs (int, optional): Number of processes creating the plots, -1 uses all CPUs. Defaults to 1.
+
 		This method reads the decomposed mutation data for different mutation contexts
 		from the NMF folder and generates signature plots. It checks the size of the
 		mutation context and chooses the appropriate plotting function accordingly.
@@ -65,7 +73,7 @@ class SigPlots:
 		for size in helpers.MutationalSigantures.SIZES:
 			self._logger.log_info(f"Creating siganture plots for context: '{size}'")
 			df = self._dfs[size]
-			barplots.signature_pdf_plot(df, self.figure_folder)
+			barplots.signature_pdf_plot(df, self.figure_folder, n_jobs)
 
 	def create_expected_plots(self, sbs: list = None) -> None:
 		"""
@@ -29,6 +29,7 @@ Author: J.A. Busker
 """
 import re
 import itertools
+from functools import cache
 import string
 import pandas as pd
 import numpy as np
@@ -186,9 +187,11 @@ NMF_INITS = ["random", "nndsvd", "nndsvda", "nndsvdar", "None"]
 BETA_LOSS = ["frobenius", "kullback-leibler", "itakura-saito"]
 
 
+@cache
 def custom_sort_column_names(column_name: str) -> tuple:
 	"""
 	    Custom sorting function for column names.
+	    The result is cached, the same column names are sorted for every context.
 
 	    Parameters:
 	* column_name (str): The column name to be sorted.
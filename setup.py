@@ -16,14 +16,16 @@ setup(
 	long_description_content_type="text/markdown",
 	url="https://github.com/AlfonsoJan/GenomeSigInfer",
 	install_requires=[
-		"numpy==1.23.1",
-		"pandas==1.5.0",
+		"numpy==1.26.2",
+		"pandas==2.1.4",
 		"pyarrow==14.0.1",
 		"fastparquet==2023.10.1",
 		"scikit_learn==1.3.1",
 		"seaborn==0.13.0",
 		"matplotlib==3.7.1",
 		"requests==2.31.0",
+		"joblib==1.3.2",
+		"pypdf==3.17.4",
 	],
 	extras_require={
 		"dev": ["pylint==3.0.2", "ruff==0.1.13"],
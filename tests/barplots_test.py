@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the `GenomeSigInfer.figures.barplots` module.
+"""
+import itertools
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from pypdf import PdfReader
+from GenomeSigInfer.figures.barplots import (
+	add_context_96_elements,
+	format_xlabels,
+	mutation_type_matrix,
+	parse_96_df,
+	parse_lager_context_df,
+	plot_context_bar,
+	smallest_context,
+	substitution_type,
+	write_signature_pdf,
+)
+from GenomeSigInfer.utils.helpers import COLOR_DICT_MUTATION, MUTATION_LIST
+
+
+class TestParseLargerContextDf(unittest.TestCase):
+	"""
+	A test case for the `parse_lager_context_df` function in the `GenomeSigInfer.figures.barplots` module.
+	"""
+
+	def setUp(self):
+		"""
+		Set up a small 5 nucleotide context DataFrame with a hand computed expected result.
+		"""
+		self.df = pd.DataFrame(
+			{
+				"MutationType": [
+					"AA[C>A]AC",
+					"CA[C>A]AG",
+					"GC[C>G]TT",
+					"TC[C>G]TA",
+				],
+				"SBS1": [0.1, 0.2, 0.3, 0.4],
+				"SBS2": [0.0, 0.0, 0.0, 0.0],
+				"SBS3": [0.5, np.nan, 0.25, 0.25],
+			}
+		)
+		self.df["context"] = smallest_context(self.df["MutationType"])
+		# The values that are not 0, by (context, name, variable)
+		# name -2 is the first nucleotide and name 2 the last nucleotide
+		self.expected_sbs1 = {
+			("A[C>A]A", -2, "A"): 0.1,
+			("A[C>A]A", -2, "C"): 0.2,
+			("A[C>A]A", 2, "C"): 0.1,
+			("A[C>A]A", 2, "G"): 0.2,
+			("C[C>G]T", -2, "G"): 0.3,
+			("C[C>G]T", -2, "T"): 0.4,
+			("C[C>G]T", 2, "T"): 0.3,
+			("C[C>G]T", 2, "A"): 0.4,
+		}
+
+	def expected_df(self, col: str, values: dict) -> pd.DataFrame:
+		"""
+		Create the expected result, one row for every context, name and variable.
+		"""
+		rows = [
+			(name, context, variable, col, values.get((context, name, variable), 0.0))
+			for context in MUTATION_LIST
+			for name in [-2, 2]
+			for variable in ["A", "C", "T", "G"]
+		]
+		return pd.DataFrame(
+			rows, columns=["name", "context", "variable", "sbs", "value"]
+		)
+
+	def assert_parsed_equal(self, result: pd.DataFrame, expected: pd.DataFrame):
+		"""
+		Compare the values, row order and column order of the parsed DataFrame.
+		"""
+		self.assertEqual(list(result.columns), list(expected.columns))
+		for column in ["name", "context", "variable", "sbs"]:
+			self.assertEqual(result[column].tolist(), expected[column].tolist())
+		np.testing.assert_allclose(result["value"], expected["value"])
+
+	def test_parse_lager_context_df(self):
+		"""
+		Test that the values are summed per context, extra context position and nucleotide.
+		"""
+		result = parse_lager_context_df(self.df, "SBS1")
+		self.assertEqual(result.shape, (len(MUTATION_LIST) * 2 * 4, 5))
+		self.assert_parsed_equal(result, self.expected_df("SBS1", self.expected_sbs1))
+		self.assertEqual(result.iloc[0].tolist()[:4], [-2, "A[C>A]A", "A", "SBS1"])
+
+	def test_parse_lager_context_df_zeros(self):
+		"""
+		Test that a signature without any value results in only zeros.
+		"""
+		result = parse_lager_context_df(self.df, "SBS2")
+		self.assert_parsed_equal(result, self.expected_df("SBS2", {}))
+
+	def test_parse_lager_context_df_missing_values(self):
+		"""
+		Test that missing values count as 0.
+		"""
+		result = parse_lager_context_df(self.df, "SBS3")
+		expected = {
+			("A[C>A]A", -2, "A"): 0.5,
+			("A[C>A]A", 2, "C"): 0.5,
+			("C[C>G]T", -2, "G"): 0.25,
+			("C[C>G]T", -2, "T"): 0.25,
+			("C[C>G]T", 2, "T"): 0.25,
+			("C[C>G]T", 2, "A"): 0.25,
+		}
+		self.assert_parsed_equal(result, self.expected_df("SBS3", expected))
+
+	def test_parse_lager_context_df_pyarrow(self):
+		"""
+		Test that mutation types read as string[pyarrow] are parsed the same.
+		"""
+		self.df["MutationType"] = self.df["MutationType"].astype("string[pyarrow]")
+		self.df["context"] = smallest_context(self.df["MutationType"])
+		result = parse_lager_context_df(self.df, "SBS1")
+		self.assert_parsed_equal(result, self.expected_df("SBS1", self.expected_sbs1))
+
+
+class TestPlotContextBar(unittest.TestCase):
+	"""
+	A test case for the `plot_context_bar` function in the `GenomeSigInfer.figures.barplots` module.
+	"""
+
+	def setUp(self):
+		"""
+		Set up the 1536 and 24576 context DataFrames, with mutation types of length 9 and 11.
+		"""
+		rng = np.random.default_rng(0)
+		self.dfs = {}
+		for flank in [1, 2]:
+			mutation_types = [
+				"".join(left) + mutation + "".join(right)
+				for mutation in MUTATION_LIST
+				for left in itertools.product("ACGT", repeat=flank)
+				for right in itertools.product("ACGT", repeat=flank)
+			]
+			df = pd.DataFrame({"MutationType": mutation_types})
+			df["SBS1"] = rng.random(len(df)) / len(df)
+			df["context"] = smallest_context(df["MutationType"])
+			self.dfs[len(mutation_types[0])] = df
+
+	def test_plot_context_bar_heights(self):
+		"""
+		Test that the heights of every (name, variable) are the parsed values in MUTATION_LIST order.
+		"""
+		for length, df in self.dfs.items():
+			with self.subTest(length=length):
+				parsed = parse_lager_context_df(df, "SBS1")
+				info = plot_context_bar(parsed, "SBS1")
+				self.assertEqual(info.heights.shape, (len(info.names), 4, 96))
+				for i, name in enumerate(info.names):
+					for j, variable in enumerate(info.variable):
+						rows = parsed[
+							(parsed["name"] == name) & (parsed["variable"] == variable)
+						]
+						self.assertEqual(rows["context"].tolist(), MUTATION_LIST)
+						np.testing.assert_array_equal(
+							info.heights[i, j], rows["value"].to_numpy()
+						)
+
+	def test_plot_context_bar_fields(self):
+		"""
+		Test the title, labels, names, variable and substitution groups of the larger contexts.
+		"""
+		expected_names = {9: [-2, 2], 11: [-3, -2, 2, 3]}
+		for length, df in self.dfs.items():
+			with self.subTest(length=length):
+				info = plot_context_bar(parse_lager_context_df(df, "SBS1"), "SBS1")
+				self.assertEqual(info.title, "SBS1")
+				self.assertEqual(list(info.labels), MUTATION_LIST)
+				self.assertEqual(list(info.names), expected_names[length])
+				self.assertEqual(list(info.variable), ["A", "C", "T", "G"])
+				self.assertEqual(
+					[mutation for mutation, _ in info.groups],
+					["C>A", "C>G", "C>T", "T>A", "T>C", "T>G"],
+				)
+				self.assertEqual(info.mutations_group_length, 6)
+
+
+class TestAddContext96Elements(unittest.TestCase):
+	"""
+	A test case for the `add_context_96_elements` function in the `GenomeSigInfer.figures.barplots` module.
+	"""
+
+	def setUp(self):
+		"""
+		Set up a 96 context DataFrame in reversed order, so T>G appears first.
+		"""
+		self.df = pd.DataFrame({"MutationType": MUTATION_LIST[::-1]})
+		self.df["SBS1"] = np.arange(96) / 96
+		self.info = plot_context_bar(parse_96_df(self.df, "SBS1"), "SBS1")
+		self.ax = Figure().subplots()
+
+	def test_add_context_96_elements(self):
+		"""
+		Test that every mutation type has its bar and color and one legend entry in order.
+		"""
+		add_context_96_elements(self.info, self.ax)
+		self.assertEqual(len(self.ax.patches), 96)
+		mutations = substitution_type(self.df["MutationType"])
+		for patch in self.ax.patches:
+			index = round(patch.get_x() + patch.get_width() / 2)
+			self.assertEqual(patch.get_height(), self.df["SBS1"].iloc[index])
+			self.assertEqual(
+				patch.get_facecolor(),
+				to_rgba(COLOR_DICT_MUTATION[mutations.iloc[index]]),
+			)
+		_, labels = self.ax.get_legend_handles_labels()
+		self.assertEqual(labels, ["T>G", "T>C", "T>A", "C>T", "C>G", "C>A"])
+
+
+class TestMutationTypeSlicing(unittest.TestCase):
+	"""
+	A test case for the `smallest_context, substitution_type` functions in the `GenomeSigInfer.figures.barplots` module.
+	"""
+
+	def setUp(self):
+		"""
+		Set up mutation types of length 7, 9 and 11.
+		"""
+		self.mutation_types = {
+			7: pd.Series(["A[C>A]T", "G[T>C]C"]),
+			9: pd.Series(["CA[C>A]AG", "TG[T>G]CA"]),
+			11: pd.Series(["AAG[C>A]TGA", "CTT[C>T]GAC"]),
+		}
+
+	def test_smallest_context(self):
+		"""
+		Test that the context of one nucleotide around the substitution is extracted.
+		"""
+		expected = {
+			7: ["A[C>A]T", "G[T>C]C"],
+			9: ["A[C>A]A", "G[T>G]C"],
+			11: ["G[C>A]T", "T[C>T]G"],
+		}
+		for length, mutation_types in self.mutation_types.items():
+			for dtype in ["object", "string[pyarrow]"]:
+				with self.subTest(length=length, dtype=dtype):
+					self.assertEqual(
+						smallest_context(mutation_types.astype(dtype)).tolist(),
+						expected[length],
+					)
+
+	def test_substitution_type(self):
+		"""
+		Test that the substitution is extracted.
+		"""
+		expected = {
+			7: ["C>A", "T>C"],
+			9: ["C>A", "T>G"],
+			11: ["C>A", "C>T"],
+		}
+		for length, mutation_types in self.mutation_types.items():
+			for dtype in ["object", "string[pyarrow]"]:
+				with self.subTest(length=length, dtype=dtype):
+					self.assertEqual(
+						substitution_type(mutation_types.astype(dtype)).tolist(),
+						expected[length],
+					)
+
+
+class TestMutationTypeMatrix(unittest.TestCase):
+	"""
+	A test case for the `mutation_type_matrix` function in the `GenomeSigInfer.figures.barplots` module.
+	"""
+
+	def test_mutation_type_matrix(self):
+		"""
+		Test that every character of the mutation types is converted to its ASCII code.
+		"""
+		mutation_types = pd.Series(["CA[C>A]AG", "TG[T>G]CA"])
+		expected = np.array(
+			[[ord(char) for char in mutation] for mutation in mutation_types],
+			dtype=np.uint8,
+		)
+		for dtype in ["object", "string[pyarrow]"]:
+			with self.subTest(dtype=dtype):
+				result = mutation_type_matrix(mutation_types.astype(dtype))
+				self.assertEqual(result.dtype, np.uint8)
+				np.testing.assert_array_equal(result, expected)
+
+
+class TestParse96Df(unittest.TestCase):
+	"""
+	A test case for the `parse_96_df` function in the `GenomeSigInfer.figures.barplots` module.
+	"""
+
+	def test_parse_96_df(self):
+		"""
+		Test that the mutation types, values and substitutions are extracted.
+		"""
+		df = pd.DataFrame({"MutationType": MUTATION_LIST, "SBS1": np.arange(96) / 96})
+		for dtype in ["object", "string[pyarrow]"]:
+			with self.subTest(dtype=dtype):
+				df["MutationType"] = df["MutationType"].astype(dtype)
+				result = parse_96_df(df, "SBS1")
+				self.assertEqual(
+					list(result.columns), ["MutationType", "SBS1", "mutation"]
+				)
+				self.assertEqual(result["MutationType"].tolist(), MUTATION_LIST)
+				self.assertEqual(result["SBS1"].tolist(), df["SBS1"].tolist())
+				self.assertEqual(
+					result["mutation"].tolist(),
+					[mutation[2:5] for mutation in MUTATION_LIST],
+				)
+
+
+class TestWriteSignaturePdf(unittest.TestCase):
+	"""
+	A test case for the `write_signature_pdf` function in the `GenomeSigInfer.figures.barplots` module.
+	"""
+
+	def setUp(self):
+		"""
+		Set up a 96 context DataFrame with five signatures and a temporary folder.
+		"""
+		self.columns = ["SBS96E", "SBS96B", "SBS96D", "SBS96A", "SBS96C"]
+		rng = np.random.default_rng(0)
+		self.df = pd.DataFrame({"MutationType": MUTATION_LIST})
+		for col in self.columns:
+			self.df[col] = rng.random(len(MUTATION_LIST)) / len(MUTATION_LIST)
+		self.x_labels_ticks = format_xlabels(MUTATION_LIST)
+		self.temp_dir = tempfile.TemporaryDirectory()
+		self.pdf_path = Path(self.temp_dir.name) / "signatures.96.pdf"
+
+	def tearDown(self):
+		"""
+		Remove the temporary folder.
+		"""
+		self.temp_dir.cleanup()
+
+	def test_write_signature_pdf_page_order(self):
+		"""
+		Test that every signature has one page, in the order of the columns.
+		"""
+		for n_jobs in [1, 2, 3]:
+			with self.subTest(n_jobs=n_jobs):
+				write_signature_pdf(
+					self.df,
+					self.columns,
+					parse_96_df,
+					self.x_labels_ticks,
+					self.pdf_path,
+					n_jobs,
+				)
+				pages = PdfReader(self.pdf_path).pages
+				self.assertEqual(len(pages), len(self.columns))
+				for page, col in zip(pages, self.columns):
+					self.assertIn(col, page.extract_text())
+
+	def test_write_signature_pdf_no_columns(self):
+		"""
+		Test that no signatures results in a PDF without pages.
+		"""
+		write_signature_pdf(
+			self.df, [], parse_96_df, self.x_labels_ticks, self.pdf_path, 2
+		)
+		self.assertEqual(len(PdfReader(self.pdf_path).pages), 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
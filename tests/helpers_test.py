@@ -43,6 +43,15 @@ class TestHelpers(unittest.TestCase):
 		self.assertEqual(custom_sort_column_names("B10"), (10, "B", ""))
 		self.assertEqual(custom_sort_column_names("C2D"), (2, "C", "D"))
 
+	def test_custom_sort_column_names_repeated(self):
+		self.assertEqual(custom_sort_column_names("SBS96A"), (96, "SBS", "A"))
+		hits = custom_sort_column_names.cache_info().hits
+		self.assertEqual(custom_sort_column_names("SBS96A"), (96, "SBS", "A"))
+		self.assertEqual(custom_sort_column_names.cache_info().hits, hits + 1)
+		self.assertEqual(
+			custom_sort_column_names("Signature"), (float("inf"), "Signature", "")
+		)
+
 	def test_generate_sequence(self):
 		self.assertEqual(generate_sequence(5), [-2, 2])
 		self.assertEqual(generate_sequence(7), [-3, -2, 2, 3])